@@ -4,4 +4,37 @@ class Settings:
     VERSION: str = "0.1.0"
     API_V1_STR: str = "/api/v1"
 
+    # Inference runtime (see app/services/analysis/runtime.py)
+    INFERENCE_WORKERS: int = 2            # inference executor threads = concurrent model inferences
+    INFERENCE_INTRA_OP_THREADS: int = 4   # torch.set_num_threads
+    INFERENCE_INTEROP_THREADS: int = 1    # torch.set_num_interop_threads (fixed once per process)
+    INFERENCE_AUTOTUNE: bool = True       # probe workers x intra-op threads on startup
+    INFERENCE_AUTOTUNE_MAX_WORKERS: int = 4
+    INFERENCE_AUTOTUNE_ROUNDS: int = 2    # passes over PROBE_TEXTS per probe
+
+    # Sentiment admission control (see app/services/analysis/admission.py)
+    SENTIMENT_MAX_PENDING: int = 8        # captions waiting for a model slot (per meeting)
+    SENTIMENT_MAX_QUEUE_WAIT: float = 3.0 # seconds before falling back to the lexicon
+    WS_MAX_OUTSTANDING_MESSAGES: int = 16 # messages handled at once per connection before reading pauses
+
+    # Fair per-meeting scheduling of model slots (deficit round-robin)
+    SCHEDULER_DEFAULT_WEIGHT: float = 1.0
+    # Per-meeting overrides, e.g. {"abc-defg-hij": {"weight": 2.0, "max_in_flight": 1, "max_pending": 4}}
+    SCHEDULER_MEETING_QUOTAS: dict = {}
+    SCHEDULER_MAX_MEETINGS: int = 100     # idle meetings kept for statistics
+    SCHEDULER_IDLE_TIMEOUT: float = 600.0 # seconds before an idle meeting's state is dropped
+
+    # Text + audio fusion (see app/services/analysis/fusion.py)
+    AUDIO_ANALYSIS_DEADLINE: float = 2.0  # seconds to wait for audio features
+
+    # In-memory history for late joiners (see app/websockets/history.py)
+    HISTORY_BUFFER_SIZE: int = 200        # analysis_result messages kept per meeting
+    HISTORY_MAX_MEETINGS: int = 100
+
+    # Delta-compressed updates for clients connecting with ?delta=true
+    # (see app/websockets/publisher.py)
+    DELTA_EPSILON: float = 0.02           # smallest emotion change worth sending
+    DELTA_SCORE_DECIMALS: int = 2         # quantization of sent scores
+    DELTA_KEYFRAME_INTERVAL: int = 20     # full message every N updates per speaker
+
 settings = Settings()
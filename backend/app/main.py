@@ -1,11 +1,21 @@
 # FastAPIアプリケーションのエントリーポイント
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from app.core.config import settings
 from app.websockets import router as ws_router
-from app.schemas import TranscriptCreate
+from app.websockets.manager import manager
+from app.schemas import TranscriptCreate, TranscriptWithAudioCreate, CombinedAnalysisResult
 from app.models.transcript import Transcript
 from app.models.session import AsyncSessionLocal, init_db
-from app.services.analysis.sentiment import initialize_sentiment_model, shutdown_sentiment_model
+from app.services.analysis.sentiment import (
+    initialize_sentiment_model,
+    initialize_sentiment_runtime,
+    shutdown_sentiment_model
+)
+from app.services.analysis.runtime import inference_runtime_status, shutdown_inference_runtime
+from app.services.analysis.admission import admission_controller
+from app.services.analysis.fusion import analyze_caption_with_audio
+import base64
+import binascii
 import uvicorn
 
 
@@ -31,11 +41,16 @@ async def on_startup():
         import traceback
         traceback.print_exc()
 
+    # Size the inference executor and torch threads for this host
+    runtime = await initialize_sentiment_runtime()
+    admission_controller.set_capacity(runtime["workers"])
+
 
 @app.on_event("shutdown")
 async def on_shutdown():
     # Clean up sentiment model
     await shutdown_sentiment_model()
+    shutdown_inference_runtime()
 
 # Include routers
 app.include_router(ws_router.router, tags=["websockets"])
@@ -54,6 +69,24 @@ async def health_check():
     }
 
 
+@app.get("/status/scheduler")
+async def scheduler_status():
+    """Inference slots, per-meeting queues, quotas and wait-time statistics"""
+    return admission_controller.status()
+
+
+@app.get("/status/runtime")
+async def runtime_status():
+    """Inference executor size, torch thread counts and autotune probe results"""
+    return inference_runtime_status()
+
+
+@app.get("/status/publisher")
+async def publisher_status():
+    """Delta subscribers and how many keyframes, deltas and suppressed updates were sent"""
+    return manager.publisher.status()
+
+
 
 
 @app.post("/transcripts")
@@ -69,6 +102,45 @@ async def create_transcript(transcript: TranscriptCreate):
         return {"status": "ok", "id": db_transcript.id}
 
 
+@app.post("/transcripts/analyze", response_model=CombinedAnalysisResult)
+async def analyze_transcript(transcript: TranscriptWithAudioCreate):
+    """Analyze a caption together with its audio clip and store both"""
+    try:
+        audio_bytes = base64.b64decode(transcript.audio, validate=True) if transcript.audio else None
+    except binascii.Error:
+        raise HTTPException(status_code=400, detail="Invalid Base64 audio data")
+
+    # No block_id here, so the caption is never superseded
+    sentiment_result, degraded, audio_result = await analyze_caption_with_audio(
+        transcript.text,
+        transcript.speaker,
+        audio_bytes,
+        transcript.audio_format,
+        meeting_id=transcript.meeting_id
+    )
+
+    async with AsyncSessionLocal() as session:
+        db_transcript = Transcript(
+            speaker=transcript.speaker,
+            text=transcript.text,
+            timestamp=transcript.timestamp,
+            sentiment_analysis=sentiment_result,
+            audio_analysis=audio_result
+        )
+        session.add(db_transcript)
+        await session.commit()
+
+    return CombinedAnalysisResult(
+        transcript_id=db_transcript.id,
+        speaker=transcript.speaker,
+        text=transcript.text,
+        timestamp=transcript.timestamp,
+        sentiment=sentiment_result,
+        audio=audio_result,
+        degraded=degraded
+    )
+
+
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -10,4 +10,5 @@ class Transcript(Base):
     speaker = Column(String, index=True)
     text = Column(Text)
     sentiment_analysis = Column(JSON, nullable=True)
+    audio_analysis = Column(JSON, nullable=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
@@ -10,6 +10,13 @@ class TranscriptCreate(BaseModel):
     timestamp: datetime
 
 
+class TranscriptWithAudioCreate(TranscriptCreate):
+    """Transcript with an optional audio clip of the utterance"""
+    audio: Optional[str] = None          # Base64 encoded audio data
+    audio_format: Optional[str] = None   # 'webm', 'wav', 'mp3', ...
+    meeting_id: str = "default"          # scheduling group for inference
+
+
 class SentimentAnalysisResult(BaseModel):
     """Sentiment analysis result with 8 WRIME emotions"""
     喜び: float      # joy
@@ -36,3 +43,4 @@ class CombinedAnalysisResult(BaseModel):
     timestamp: datetime
     sentiment: SentimentAnalysisResult
     audio: Optional[AudioAnalysisResult] = None
+    degraded: bool = False  # sentiment scored by the lexicon fallback
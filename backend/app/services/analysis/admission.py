@@ -0,0 +1,286 @@
+# 感情分析のアドミッション制御（過負荷時の縮退運転・会議ごとの公平なスケジューリング）
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.analysis.lexicon import analyze_sentiment_lexicon
+from app.services.analysis.sentiment import analyze_sentiment
+
+# Decisions handed to a waiting request
+_ADMITTED = "admitted"
+_DEGRADED = "degraded"
+_SUPERSEDED = "superseded"
+
+# Number of recent waits kept per meeting for the p95 statistic
+_WAIT_WINDOW = 200
+
+
+class _PendingRequest:
+    """A caption waiting for a free model slot"""
+
+    def __init__(self, block_id: Optional[str]):
+        self.block_id = block_id
+        self.enqueued_at = asyncio.get_running_loop().time()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class _MeetingState:
+    """Queue, quota and statistics of one meeting"""
+
+    def __init__(self, weight: float, max_in_flight: int, max_pending: int):
+        self.weight = weight
+        self.max_in_flight = max_in_flight
+        self.max_pending = max_pending
+        self.in_flight = 0
+        self.deficit = 0.0
+        self.pending: "OrderedDict[str, _PendingRequest]" = OrderedDict()
+        self.stats = {"admitted": 0, "degraded": 0, "superseded": 0}
+        self.waits: deque = deque(maxlen=_WAIT_WINDOW)
+        self.max_wait = 0.0
+        self.last_seen = time.monotonic()
+
+    def record_wait(self, seconds: float) -> None:
+        self.waits.append(seconds)
+        self.max_wait = max(self.max_wait, seconds)
+
+    def status(self) -> Dict[str, float]:
+        waits = sorted(self.waits)
+        return {
+            "in_flight": self.in_flight,
+            "pending": len(self.pending),
+            "weight": self.weight,
+            "max_in_flight": self.max_in_flight,
+            "max_pending": self.max_pending,
+            "wait_mean": sum(waits) / len(waits) if waits else 0.0,
+            # Nearest-rank percentile
+            "wait_p95": waits[math.ceil(0.95 * len(waits)) - 1] if waits else 0.0,
+            "wait_max": self.max_wait,
+            **self.stats
+        }
+
+
+class AdmissionController:
+    """
+    Bounded in-flight budget in front of analyze_sentiment.
+
+    - At most `max_in_flight` model inferences run at the same time.
+    - Captions that have to wait are queued per meeting. Freed slots are
+      handed out by deficit round-robin over the meetings' weights, so a
+      chatty meeting cannot starve the others. Each meeting may also be capped
+      on concurrent inferences and waiting captions (`quotas`).
+    - State of idle meetings is dropped after `idle_timeout` seconds, or
+      least recently used first beyond `max_meetings` (quota-configured
+      meetings are kept).
+    - While the model is saturated, at most one caption per speaker waits for a
+      slot (the newest one). An older waiting caption from the same caption
+      block is dropped; one from a previous block is scored with the lexicon.
+    - Captions that cannot wait (queue full, or waited longer than
+      `max_queue_wait` seconds) are scored with the lexicon and flagged as degraded.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_pending: int,
+        max_queue_wait: float,
+        default_weight: float = 1.0,
+        quotas: Optional[Dict[str, Dict[str, float]]] = None,
+        max_meetings: int = 100,
+        idle_timeout: float = 600.0
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_pending = max_pending
+        self.max_queue_wait = max_queue_wait
+        self.default_weight = default_weight
+        self.quotas = quotas or {}
+        self.max_meetings = max_meetings
+        self.idle_timeout = idle_timeout
+        self._in_flight = 0
+        # Least recently used first
+        self._meetings: "OrderedDict[str, _MeetingState]" = OrderedDict()
+        # Meetings with waiting captions, in round-robin order
+        self._active: deque = deque()
+
+    def _meeting(self, meeting_id: str) -> _MeetingState:
+        state = self._meetings.get(meeting_id)
+        if state is None:
+            quota = self.quotas.get(meeting_id, {})
+            state = _MeetingState(
+                weight=max(float(quota.get("weight", self.default_weight)), 0.01),
+                max_in_flight=int(quota.get("max_in_flight", self.max_in_flight)),
+                max_pending=int(quota.get("max_pending", self.max_pending))
+            )
+            self._meetings[meeting_id] = state
+            self._prune(keep=meeting_id)
+        else:
+            self._meetings.move_to_end(meeting_id)
+        state.last_seen = time.monotonic()
+        return state
+
+    def _prune(self, keep: Optional[str] = None) -> None:
+        """Drop idle meetings that timed out, or the least recently used beyond max_meetings"""
+        now = time.monotonic()
+        for meeting_id in list(self._meetings):
+            meeting = self._meetings[meeting_id]
+            if meeting_id == keep or meeting_id in self.quotas or meeting.in_flight or meeting.pending:
+                continue
+            if len(self._meetings) > self.max_meetings or now - meeting.last_seen > self.idle_timeout:
+                del self._meetings[meeting_id]
+
+    async def analyze(
+        self,
+        text: str,
+        speaker: str,
+        block_id: Optional[str] = None,
+        meeting_id: str = "default"
+    ) -> Optional[Tuple[Dict[str, float], bool]]:
+        """
+        Score a caption, degrading under overload
+
+        Returns:
+            (sentiment, degraded) or None when the caption was superseded by a
+            newer update of the same caption block and should be dropped.
+        """
+        meeting = self._meeting(meeting_id)
+
+        # A free slot means nobody eligible is waiting (_release hands slots over)
+        if self._in_flight < self.max_in_flight and meeting.in_flight < meeting.max_in_flight:
+            self._in_flight += 1
+            meeting.in_flight += 1
+            meeting.record_wait(0.0)
+            return await self._run_model(text, meeting)
+
+        previous = meeting.pending.get(speaker)
+        if previous is not None:
+            if block_id is not None and previous.block_id == block_id:
+                previous.future.set_result(_SUPERSEDED)
+            else:
+                previous.future.set_result(_DEGRADED)
+        elif len(meeting.pending) >= meeting.max_pending:
+            return self._degrade(text, meeting)
+
+        # The newest utterance takes over the speaker's queue position
+        pending = _PendingRequest(block_id)
+        meeting.pending[speaker] = pending
+        if meeting_id not in self._active:
+            self._active.append(meeting_id)
+
+        try:
+            await asyncio.wait({pending.future}, timeout=self.max_queue_wait)
+        except asyncio.CancelledError:
+            self._abandon(meeting, speaker, pending)
+            raise
+
+        if not pending.future.done():
+            # Waited too long: stop waiting and answer with the cheap scorer
+            self._dequeue(meeting, speaker, pending)
+            pending.future.cancel()
+            meeting.record_wait(self.max_queue_wait)
+            return self._degrade(text, meeting)
+
+        decision = pending.future.result()
+        if decision == _SUPERSEDED:
+            meeting.stats["superseded"] += 1
+            return None
+        if decision == _DEGRADED:
+            return self._degrade(text, meeting)
+
+        # _ADMITTED: the slot was handed over by _release()
+        meeting.record_wait(asyncio.get_running_loop().time() - pending.enqueued_at)
+        return await self._run_model(text, meeting)
+
+    async def _run_model(self, text: str, meeting: _MeetingState) -> Tuple[Dict[str, float], bool]:
+        meeting.stats["admitted"] += 1
+        try:
+            return await analyze_sentiment(text), False
+        finally:
+            meeting.in_flight -= 1
+            self._release()
+
+    def _degrade(self, text: str, meeting: _MeetingState) -> Tuple[Dict[str, float], bool]:
+        meeting.stats["degraded"] += 1
+        return analyze_sentiment_lexicon(text), True
+
+    def _release(self) -> None:
+        """Hand the freed slot to the next waiting caption (deficit round-robin), or free it"""
+        skipped = 0
+        while self._in_flight <= self.max_in_flight and self._active and skipped < len(self._active):
+            meeting = self._meetings.get(self._active[0])
+
+            if meeting is None or not meeting.pending:
+                self._active.popleft()
+                if meeting is not None:
+                    meeting.deficit = 0.0
+                continue
+
+            if meeting.in_flight >= meeting.max_in_flight:
+                # Over its quota: let the others go first
+                self._active.rotate(-1)
+                skipped += 1
+                continue
+
+            skipped = 0
+            if meeting.deficit < 1.0:
+                meeting.deficit += meeting.weight
+                self._active.rotate(-1)
+                continue
+
+            _, pending = meeting.pending.popitem(last=False)
+            if pending.future.done():
+                continue
+            meeting.deficit -= 1.0
+            pending.future.set_result(_ADMITTED)
+            meeting.in_flight += 1
+            return
+
+        self._in_flight -= 1
+
+    def set_capacity(self, max_in_flight: int) -> None:
+        """Resize the in-flight budget (e.g. to the tuned inference executor size)"""
+        added = max_in_flight - self.max_in_flight
+        self.max_in_flight = max_in_flight
+        for meeting_id, meeting in self._meetings.items():
+            if "max_in_flight" not in self.quotas.get(meeting_id, {}):
+                meeting.max_in_flight = max_in_flight
+        # Hand the new slots to waiting captions right away
+        for _ in range(max(added, 0)):
+            self._in_flight += 1
+            self._release()
+
+    def _dequeue(self, meeting: _MeetingState, speaker: str, pending: _PendingRequest) -> None:
+        if meeting.pending.get(speaker) is pending:
+            del meeting.pending[speaker]
+
+    def _abandon(self, meeting: _MeetingState, speaker: str, pending: _PendingRequest) -> None:
+        """Clean up after a waiting caption whose task was cancelled"""
+        self._dequeue(meeting, speaker, pending)
+        if pending.future.done() and not pending.future.cancelled() and pending.future.result() == _ADMITTED:
+            meeting.in_flight -= 1
+            self._release()
+        pending.future.cancel()
+
+    def status(self) -> Dict[str, object]:
+        self._prune()
+        return {
+            "in_flight": self._in_flight,
+            "pending": sum(len(m.pending) for m in self._meetings.values()),
+            "max_in_flight": self.max_in_flight,
+            "meetings": {
+                meeting_id: meeting.status()
+                for meeting_id, meeting in self._meetings.items()
+            }
+        }
+
+
+admission_controller = AdmissionController(
+    max_in_flight=settings.INFERENCE_WORKERS,
+    max_pending=settings.SENTIMENT_MAX_PENDING,
+    max_queue_wait=settings.SENTIMENT_MAX_QUEUE_WAIT,
+    default_weight=settings.SCHEDULER_DEFAULT_WEIGHT,
+    quotas=settings.SCHEDULER_MEETING_QUOTAS,
+    max_meetings=settings.SCHEDULER_MAX_MEETINGS,
+    idle_timeout=settings.SCHEDULER_IDLE_TIMEOUT
+)
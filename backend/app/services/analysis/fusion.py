@@ -0,0 +1,58 @@
+# テキストと音声の並列分析（感情分析＋音声分析の統合）
+import asyncio
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.analysis.admission import admission_controller
+from app.services.analysis.audio import analyze_audio
+
+
+async def analyze_caption_with_audio(
+    text: str,
+    speaker: str,
+    audio_bytes: Optional[bytes] = None,
+    format_hint: Optional[str] = None,
+    block_id: Optional[str] = None,
+    meeting_id: str = "default"
+) -> Optional[Tuple[Dict[str, float], bool, Optional[Dict[str, float]]]]:
+    """
+    Run sentiment and audio analysis concurrently
+
+    The audio result is only waited for until `settings.AUDIO_ANALYSIS_DEADLINE`
+    seconds after the call started; a slower decode is abandoned so the text
+    result is never blocked by it.
+
+    Returns:
+        (sentiment, degraded, audio) where audio is None when no clip was given
+        or it missed the deadline, or None when the caption was superseded
+        (see AdmissionController.analyze).
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.AUDIO_ANALYSIS_DEADLINE
+
+    audio_task = None
+    if audio_bytes:
+        audio_task = asyncio.create_task(analyze_audio(audio_bytes, format_hint))
+
+    try:
+        admission = await admission_controller.analyze(text, speaker, block_id, meeting_id)
+    except BaseException:
+        if audio_task is not None:
+            audio_task.cancel()
+        raise
+
+    if admission is None:
+        if audio_task is not None:
+            audio_task.cancel()
+        return None
+
+    sentiment_result, degraded = admission
+    audio_result = None
+    if audio_task is not None:
+        remaining = max(0.0, deadline - loop.time())
+        try:
+            audio_result = await asyncio.wait_for(audio_task, timeout=remaining)
+        except asyncio.TimeoutError:
+            print(f"Audio analysis exceeded {settings.AUDIO_ANALYSIS_DEADLINE}s deadline, returning text result only")
+
+    return sentiment_result, degraded, audio_result
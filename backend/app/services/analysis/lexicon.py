@@ -0,0 +1,37 @@
+# 辞書ベースの軽量感情スコアラー（過負荷時のフォールバック用）
+from typing import Dict
+
+from app.services.analysis.sentiment import EMOTION_LABELS
+
+# Small keyword lexicon for the 8 WRIME emotions.
+# Much less accurate than the DeBERTa model, but runs in microseconds on the
+# event loop, so it is used when the model is saturated.
+EMOTION_LEXICON: Dict[str, tuple] = {
+    "喜び": ("嬉し", "うれし", "楽し", "たのし", "よかった", "良かった", "最高", "幸せ", "ありがと", "素晴らし", "やった"),
+    "悲しみ": ("悲し", "かなし", "残念", "寂し", "さびし", "つら", "辛い", "泣", "申し訳", "失敗"),
+    "期待": ("楽しみ", "期待", "したい", "できそう", "頑張", "がんば", "目指", "予定", "きっと"),
+    "驚き": ("びっくり", "驚", "まさか", "えっ", "突然", "予想外", "すごい", "本当に？"),
+    "怒り": ("怒", "腹が立", "許せな", "ふざけ", "いい加減", "ムカ", "むかつ", "うるさい"),
+    "恐れ": ("怖", "こわ", "不安", "心配", "緊張", "やばい", "危な", "間に合わ"),
+    "嫌悪": ("嫌", "いや", "最悪", "気持ち悪", "うんざり", "だめ", "ダメ", "ひどい"),
+    "信頼": ("信じ", "信頼", "任せ", "安心", "大丈夫", "確か", "しっかり", "一緒"),
+}
+
+
+def analyze_sentiment_lexicon(text: str) -> Dict[str, float]:
+    """
+    Cheap keyword-based emotion scoring (same output shape as analyze_sentiment)
+
+    Scores are keyword hit counts with add-one smoothing, normalized to sum to 1.0.
+    Text without any hits therefore gets a uniform distribution.
+    """
+    if not text or not text.strip():
+        return {label: 0.0 for label in EMOTION_LABELS}
+
+    counts = {
+        label: 1.0 + sum(text.count(keyword) for keyword in EMOTION_LEXICON[label])
+        for label in EMOTION_LABELS
+    }
+    total = sum(counts.values())
+
+    return {label: count / total for label, count in counts.items()}
@@ -0,0 +1,162 @@
+# 推論用スレッドプールとtorchスレッド数の管理・自動チューニング
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import torch
+
+from app.core.config import settings
+
+# Dedicated executor for model inference (separate from the default asyncio executor)
+_executor: Optional[ThreadPoolExecutor] = None
+_workers: int = 0
+_interop_configured: bool = False
+_status: Dict = {"source": "not initialized"}
+
+
+def configure_torch_threads(intra_op_threads: int) -> None:
+    """
+    Set torch intra-op threads, and inter-op threads once per process
+
+    torch only allows setting the inter-op pool size before any inter-op
+    parallel work has started, so it is fixed at the first call.
+    """
+    global _interop_configured
+
+    if not _interop_configured:
+        try:
+            torch.set_num_interop_threads(settings.INFERENCE_INTEROP_THREADS)
+        except RuntimeError as e:
+            print(f"⚠ Could not set inter-op threads: {e}")
+        _interop_configured = True
+
+    torch.set_num_threads(intra_op_threads)
+
+
+def configure_executor(workers: int) -> None:
+    """(Re)create the inference executor with `workers` threads"""
+    global _executor, _workers
+
+    previous = _executor
+    _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+    _workers = workers
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+
+async def run_in_inference_executor(fn: Callable, *args):
+    """Run a blocking inference function on the dedicated executor"""
+    if _executor is None:
+        configure_executor(settings.INFERENCE_WORKERS)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args))
+
+
+def _available_cpus() -> int:
+    """CPUs this process may run on (respects affinity masks / container cpusets)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _candidate_sizes(limit: int) -> List[int]:
+    sizes = []
+    size = 1
+    while size <= limit:
+        sizes.append(size)
+        size *= 2
+    if sizes[-1] != limit:
+        sizes.append(limit)
+    return sizes
+
+
+def autotune_runtime(infer_one: Callable[[str], object], texts: List[str]) -> Dict:
+    """
+    Probe intra-op threads x concurrent workers and keep the fastest combination
+
+    Each combination runs `texts` (repeated INFERENCE_AUTOTUNE_ROUNDS times)
+    through a temporary pool of `workers` threads, the same way captions are
+    served, and is scored by captions per second. Combinations using more
+    threads than there are CPUs available to this process are skipped.
+    """
+    cores = _available_cpus()
+    workload = texts * settings.INFERENCE_AUTOTUNE_ROUNDS
+    probes = []
+
+    for workers in _candidate_sizes(min(settings.INFERENCE_AUTOTUNE_MAX_WORKERS, cores)):
+        for intra_op_threads in _candidate_sizes(max(cores // workers, 1)):
+            configure_torch_threads(intra_op_threads)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(infer_one, texts[:workers]))  # warm-up
+                start = time.perf_counter()
+                list(pool.map(infer_one, workload))
+                elapsed = time.perf_counter() - start
+
+            probes.append({
+                "intra_op_threads": intra_op_threads,
+                "workers": workers,
+                "throughput": len(workload) / elapsed
+            })
+            print(f"  probe: workers={workers} intra_op_threads={intra_op_threads} "
+                  f"→ {probes[-1]['throughput']:.2f} captions/s")
+
+    best = max(probes, key=lambda probe: probe["throughput"])
+    return {**best, "probes": probes}
+
+
+async def initialize_inference_runtime(
+    infer_one: Optional[Callable[[str], object]] = None,
+    texts: Optional[List[str]] = None
+) -> Dict:
+    """
+    Size the inference executor and torch threads for this host
+
+    With INFERENCE_AUTOTUNE enabled and a workload given, the configuration is
+    chosen by autotune_runtime(); otherwise the configured defaults are used.
+    """
+    global _status
+
+    intra_op_threads = settings.INFERENCE_INTRA_OP_THREADS
+    workers = settings.INFERENCE_WORKERS
+    tuned: Dict = {}
+
+    if settings.INFERENCE_AUTOTUNE and infer_one is not None and texts:
+        print("Tuning inference runtime...")
+        try:
+            tuned = await asyncio.to_thread(autotune_runtime, infer_one, texts)
+            intra_op_threads = tuned["intra_op_threads"]
+            workers = tuned["workers"]
+        except Exception as e:
+            print(f"✗ Inference runtime tuning failed, using defaults: {e}")
+            import traceback
+            traceback.print_exc()
+
+    configure_torch_threads(intra_op_threads)
+    configure_executor(workers)
+
+    _status = {
+        "source": "autotune" if tuned else "settings",
+        "cpu_count": _available_cpus(),
+        "intra_op_threads": torch.get_num_threads(),
+        "inter_op_threads": torch.get_num_interop_threads(),
+        "workers": workers,
+        "throughput": tuned.get("throughput"),
+        "probes": tuned.get("probes", [])
+    }
+    print(f"✓ Inference runtime: workers={workers}, intra_op_threads={intra_op_threads}, "
+          f"inter_op_threads={_status['inter_op_threads']} ({_status['source']})")
+    return _status
+
+
+def inference_runtime_status() -> Dict:
+    return _status
+
+
+def shutdown_inference_runtime() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
@@ -1,8 +1,13 @@
 # 感情分析ロジック
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
-from typing import Dict, Optional
-import asyncio
+from typing import Dict, List, Optional
+from app.services.analysis.runtime import (
+    configure_torch_threads,
+    initialize_inference_runtime,
+    run_in_inference_executor
+)
+from app.core.config import settings
 
 # Global variables for model and tokenizer
 _model: Optional[AutoModelForSequenceClassification] = None
@@ -21,6 +26,18 @@ EMOTION_LABELS = [
     "信頼"       # trust
 ]
 
+# Representative captions used to tune the inference runtime on startup
+PROBE_TEXTS = [
+    "はい",
+    "了解です、ありがとうございます。",
+    "今日のプレゼンは大成功でした！みんなに褒められて嬉しいです。",
+    "プロジェクトが遅れていて本当に心配です。間に合うか不安です。",
+    "明日の会議、うまくいくかな。ちょっと緊張します。",
+    "新しい技術を学ぶのが楽しみです。きっと成長できると思います。",
+    "先週の議事録を確認したのですが、いくつか決まっていない点があるので、今日の会議で担当者と期限を決めてしまいたいと思います。",
+    "チームメンバーを信じています。一緒なら乗り越えられます。",
+]
+
 
 async def initialize_sentiment_model() -> None:
     """Initialize the sentiment analysis model on startup"""
@@ -32,6 +49,10 @@ async def initialize_sentiment_model() -> None:
 
         print(f"Loading sentiment model: {model_name}...")
 
+        # Set CPU thread counts before torch starts any parallel work
+        # (re-tuned by initialize_inference_runtime() after loading)
+        configure_torch_threads(settings.INFERENCE_INTRA_OP_THREADS)
+
         # Load tokenizer
         _tokenizer = AutoTokenizer.from_pretrained(model_name)
 
@@ -47,9 +68,6 @@ async def initialize_sentiment_model() -> None:
         # Move to CPU
         _model.to(_device)
 
-        # Set CPU thread count for optimization
-        torch.set_num_threads(4)
-
         print(f"✓ Sentiment model loaded successfully on {_device}")
 
     except Exception as e:
@@ -87,8 +105,8 @@ async def analyze_sentiment(text: str) -> Dict[str, float]:
         return {label: 0.0 for label in EMOTION_LABELS}
 
     try:
-        # Run inference in thread pool to not block event loop
-        result = await asyncio.to_thread(_run_inference, text)
+        # Run inference on the dedicated inference executor to not block event loop
+        result = await run_in_inference_executor(_run_inference, text)
         return result
 
     except Exception as e:
@@ -103,9 +121,16 @@ def _run_inference(text: str) -> Dict[str, float]:
     """
     Synchronous inference function (runs in thread pool)
     """
+    return _run_batch_inference([text])[0]
+
+
+def _run_batch_inference(texts: List[str]) -> List[Dict[str, float]]:
+    """
+    Synchronous inference for several texts in one forward pass (runs in thread pool)
+    """
     # Tokenize input
     inputs = _tokenizer(
-        text,
+        texts,
         return_tensors="pt",
         truncation=True,
         max_length=512,
@@ -123,13 +148,21 @@ def _run_inference(text: str) -> Dict[str, float]:
     # Apply softmax to get probabilities
     probabilities = torch.nn.functional.softmax(logits, dim=-1)
 
-    # Convert to dictionary
-    scores = probabilities[0].cpu().numpy().tolist()
+    # Convert to dictionaries
+    return [
+        {
+            label: float(score)
+            for label, score in zip(EMOTION_LABELS, scores)
+        }
+        for scores in probabilities.cpu().numpy().tolist()
+    ]
+
 
-    return {
-        label: float(score)
-        for label, score in zip(EMOTION_LABELS, scores)
-    }
+async def initialize_sentiment_runtime() -> Dict:
+    """Size the inference executor for this host, probing the model if it loaded"""
+    if _model is None or _tokenizer is None:
+        return await initialize_inference_runtime()
+    return await initialize_inference_runtime(_run_inference, PROBE_TEXTS)
 
 
 async def shutdown_sentiment_model() -> None:
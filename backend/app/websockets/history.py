@@ -0,0 +1,135 @@
+# 会議ごとの直近の分析結果を保持するリングバッファ（途中参加・再接続用）
+import asyncio
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.websockets.manager import manager
+
+
+class MeetingHistory:
+    """
+    Recent analysis_result messages of one meeting plus running aggregates.
+
+    The buffer only holds the last `maxlen` messages; the aggregates cover
+    every message since the server started tracking the meeting.
+    """
+
+    def __init__(self, meeting_id: str, maxlen: int):
+        self.meeting_id = meeting_id
+        self.messages: deque = deque(maxlen=maxlen)
+        self.message_count = 0
+        self.last_transcript_id: Optional[int] = None
+        # Highest transcript_id that fell out of the buffer
+        self.evicted_transcript_id: Optional[int] = None
+        self.emotion_sums: Dict[str, float] = {}
+        self.speakers: Dict[str, Dict] = {}
+        # Held while a result is saved, recorded and broadcast (see router.py)
+        self.lock = asyncio.Lock()
+        # Handlers holding or waiting for the lock; the meeting is not evicted meanwhile
+        self.in_use = 0
+
+    def append(self, message: Dict) -> None:
+        if len(self.messages) == self.messages.maxlen:
+            evicted_id = self.messages[0]["transcript_id"]
+            self.evicted_transcript_id = max(self.evicted_transcript_id or 0, evicted_id)
+        self.messages.append(message)
+
+        transcript_id = message["transcript_id"]
+        self.last_transcript_id = max(self.last_transcript_id or 0, transcript_id)
+        self.message_count += 1
+
+        speaker = self.speakers.setdefault(message["speaker"], {"count": 0, "emotion_sums": {}})
+        speaker["count"] += 1
+        speaker["last_transcript_id"] = transcript_id
+        for label, score in (message.get("sentiment") or {}).items():
+            self.emotion_sums[label] = self.emotion_sums.get(label, 0.0) + score
+            speaker["emotion_sums"][label] = speaker["emotion_sums"].get(label, 0.0) + score
+
+    def snapshot(self) -> Dict:
+        """Compact aggregate state: mean emotions overall and per speaker"""
+        return {
+            "type": "snapshot",
+            "meeting_id": self.meeting_id,
+            "message_count": self.message_count,
+            "last_transcript_id": self.last_transcript_id,
+            "emotions": _mean(self.emotion_sums, self.message_count),
+            "speakers": {
+                name: {
+                    "count": speaker["count"],
+                    "last_transcript_id": speaker["last_transcript_id"],
+                    "emotions": _mean(speaker["emotion_sums"], speaker["count"])
+                }
+                for name, speaker in self.speakers.items()
+            }
+        }
+
+    def since(self, last_transcript_id: Optional[int]) -> Tuple[List[Dict], bool]:
+        """
+        Buffered messages newer than `last_transcript_id` (all when None)
+
+        Returns:
+            (messages, truncated) where truncated is True when some messages the
+            client has not seen already fell out of the buffer.
+        """
+        if last_transcript_id is None:
+            return list(self.messages), self.evicted_transcript_id is not None
+
+        messages = [m for m in self.messages if m["transcript_id"] > last_transcript_id]
+        truncated = (
+            self.evicted_transcript_id is not None
+            and self.evicted_transcript_id > last_transcript_id
+        )
+        return messages, truncated
+
+
+class HistoryStore:
+    """
+    MeetingHistory per meeting, evicting the least recently updated meetings
+
+    A meeting is only tracked once it has a result to record. Meetings with
+    connected clients or handlers using their lock (`in_use`) are never evicted,
+    so the store may exceed `max_meetings` while they are all in use.
+    """
+
+    def __init__(self, buffer_size: int, max_meetings: int):
+        self.buffer_size = buffer_size
+        self.max_meetings = max_meetings
+        self._meetings: "OrderedDict[str, MeetingHistory]" = OrderedDict()
+
+    def get(self, meeting_id: str) -> MeetingHistory:
+        meeting = self._meetings.get(meeting_id)
+        if meeting is None:
+            self._evict(room_for=1)
+            meeting = MeetingHistory(meeting_id, self.buffer_size)
+            self._meetings[meeting_id] = meeting
+        return meeting
+
+    def find(self, meeting_id: str) -> MeetingHistory:
+        """The meeting's history, or an empty one that is not stored"""
+        return self._meetings.get(meeting_id) or MeetingHistory(meeting_id, self.buffer_size)
+
+    def _evict(self, room_for: int) -> None:
+        for meeting_id in list(self._meetings):
+            if len(self._meetings) + room_for <= self.max_meetings:
+                return
+            meeting = self._meetings[meeting_id]
+            if meeting.in_use or manager.has_connections(meeting_id):
+                continue
+            del self._meetings[meeting_id]
+
+    def record(self, meeting_id: str, message: Dict) -> None:
+        self.get(meeting_id).append(message)
+        self._meetings.move_to_end(meeting_id)
+
+
+def _mean(sums: Dict[str, float], count: int) -> Dict[str, float]:
+    if not count:
+        return {}
+    return {label: total / count for label, total in sums.items()}
+
+
+history = HistoryStore(
+    buffer_size=settings.HISTORY_BUFFER_SIZE,
+    max_meetings=settings.HISTORY_MAX_MEETINGS
+)
@@ -1,20 +1,52 @@
 # WebSocket接続の管理
 from fastapi import WebSocket
-from typing import List
+from typing import Dict, List, Optional
+import json
+from app.core.config import settings
+from app.websockets.publisher import DeltaPublisher
 
 class ConnectionManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        self.connection_meetings: Dict[WebSocket, str] = {}
+        self.publisher = DeltaPublisher(
+            epsilon=settings.DELTA_EPSILON,
+            score_decimals=settings.DELTA_SCORE_DECIMALS,
+            keyframe_interval=settings.DELTA_KEYFRAME_INTERVAL
+        )
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, meeting_id: str = "default", delta: bool = False):
         await websocket.accept()
         self.active_connections.append(websocket)
+        self.connection_meetings[websocket] = meeting_id
+        if delta:
+            self.publisher.subscribe(websocket)
 
     def disconnect(self, websocket: WebSocket):
         self.active_connections.remove(websocket)
+        self.connection_meetings.pop(websocket, None)
+        self.publisher.unsubscribe(websocket)
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+    def has_connections(self, meeting_id: str) -> bool:
+        return meeting_id in self.connection_meetings.values()
+
+    async def broadcast(self, message: str, meeting_id: Optional[str] = None):
+        """Send to every connection, or only to those joined to `meeting_id`"""
+        for connection in list(self.active_connections):
+            if meeting_id is None or self.connection_meetings.get(connection) == meeting_id:
+                await connection.send_text(message)
+
+    async def publish(self, message: Dict, meeting_id: str):
+        """Send an analysis_result: in full, or as a delta to connections that asked for it"""
+        full_message = json.dumps(message)
+        for connection in list(self.active_connections):
+            if self.connection_meetings.get(connection) != meeting_id:
+                continue
+            if not self.publisher.is_subscribed(connection):
+                await connection.send_text(full_message)
+                continue
+            delta = self.publisher.encode(connection, message)
+            if delta is not None:
+                await connection.send_text(json.dumps(delta))
 
 manager = ConnectionManager()
@@ -0,0 +1,120 @@
+# 購読者ごとの送信済み状態を保持し、差分のみを送る配信ロジック
+from typing import Dict, Optional
+
+from fastapi import WebSocket
+
+
+class _SpeakerState:
+    """What a subscriber last received for one speaker"""
+
+    def __init__(self):
+        self.text = ""
+        self.sentiment: Dict[str, float] = {}
+        self.degraded = False
+        self.audio: Optional[Dict[str, float]] = None
+        self.timestamp: Optional[str] = None
+        self.since_keyframe = 0
+
+
+class DeltaPublisher:
+    """
+    Turns full analysis_result messages into per-subscriber deltas.
+
+    For each subscriber and speaker it remembers the last text, quantized
+    emotion scores, audio features, timestamp and degraded flag that were
+    sent, and emits an `analysis_delta` with only what changed:
+    - `text_append` when the caption grew, `text` when it was replaced
+    - `sentiment` with the emotions that moved by at least `epsilon`
+    - `audio` and `degraded` when they differ
+    Updates where none of these changed are suppressed; otherwise the delta
+    also carries `timestamp` when it differs (a new timestamp alone, which
+    nearly every update has, does not make an update worth sending). Every
+    `keyframe_interval` updates per speaker (and for the first one) the full
+    message is sent with `"keyframe": true`.
+    """
+
+    def __init__(self, epsilon: float, score_decimals: int, keyframe_interval: int):
+        self.epsilon = epsilon
+        self.score_decimals = score_decimals
+        self.keyframe_interval = keyframe_interval
+        self._subscribers: Dict[WebSocket, Dict[str, _SpeakerState]] = {}
+        self.stats = {"keyframes": 0, "deltas": 0, "suppressed": 0}
+
+    def subscribe(self, websocket: WebSocket) -> None:
+        self._subscribers[websocket] = {}
+
+    def unsubscribe(self, websocket: WebSocket) -> None:
+        self._subscribers.pop(websocket, None)
+
+    def is_subscribed(self, websocket: WebSocket) -> bool:
+        return websocket in self._subscribers
+
+    def status(self) -> Dict[str, object]:
+        return {
+            "subscribers": len(self._subscribers),
+            "epsilon": self.epsilon,
+            "score_decimals": self.score_decimals,
+            "keyframe_interval": self.keyframe_interval,
+            **self.stats
+        }
+
+    def encode(self, websocket: WebSocket, message: Dict) -> Optional[Dict]:
+        """Message to send to `websocket` for this analysis_result, or None to skip it"""
+        speakers = self._subscribers[websocket]
+        state = speakers.get(message["speaker"])
+        sentiment = {
+            label: round(score, self.score_decimals)
+            for label, score in (message.get("sentiment") or {}).items()
+        }
+        text = message.get("text", "")
+        degraded = message.get("degraded", False)
+        audio = message.get("audio")
+        timestamp = message.get("timestamp")
+
+        if state is None or state.since_keyframe >= self.keyframe_interval:
+            state = speakers.setdefault(message["speaker"], _SpeakerState())
+            state.text = text
+            state.sentiment = sentiment
+            state.degraded = degraded
+            state.audio = audio
+            state.timestamp = timestamp
+            state.since_keyframe = 0
+            self.stats["keyframes"] += 1
+            return {**message, "sentiment": sentiment, "keyframe": True}
+
+        changed = {
+            label: score
+            for label, score in sentiment.items()
+            if abs(score - state.sentiment.get(label, 0.0)) >= self.epsilon
+        }
+        if text == state.text and not changed and degraded == state.degraded and audio == state.audio:
+            self.stats["suppressed"] += 1
+            return None
+
+        delta = {
+            "type": "analysis_delta",
+            "transcript_id": message["transcript_id"],
+            "speaker": message["speaker"]
+        }
+        if text != state.text:
+            if state.text and text.startswith(state.text):
+                delta["text_append"] = text[len(state.text):]
+            else:
+                delta["text"] = text
+        if changed:
+            delta["sentiment"] = changed
+        if audio != state.audio:
+            delta["audio"] = audio
+        if timestamp != state.timestamp:
+            delta["timestamp"] = timestamp
+        if degraded != state.degraded:
+            delta["degraded"] = degraded
+
+        state.text = text
+        state.sentiment.update(changed)
+        state.degraded = degraded
+        state.audio = audio
+        state.timestamp = timestamp
+        state.since_keyframe += 1
+        self.stats["deltas"] += 1
+        return delta
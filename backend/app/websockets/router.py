@@ -1,53 +1,90 @@
 # WebSocketのルーティングとメッセージ処理ロジック
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from app.core.config import settings
 from app.websockets.manager import manager
+from app.websockets.history import history
 from app.models.session import AsyncSessionLocal
 from app.models.transcript import Transcript
-from app.services.analysis.sentiment import analyze_sentiment
+from app.services.analysis.fusion import analyze_caption_with_audio
+import asyncio
+import base64
 import json
 from datetime import datetime
+from typing import Optional
 
 router = APIRouter()
 
-@router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+
+async def _wait_for(previous: Optional[asyncio.Task]) -> None:
+    if previous is not None:
+        await asyncio.wait({previous})
+
+
+async def handle_message(data: str, meeting_id: str, previous: Optional[asyncio.Task] = None):
+    """
+    Analyze, persist and broadcast one caption message
+
+    Analysis runs concurrently with other messages, but every way out of this
+    function (saving and broadcasting, dropping a superseded caption, reporting
+    an error) first waits for `previous`, the connection's preceding message.
+    A task is therefore done only after all earlier ones, and transcripts are
+    stored and sent in the order they arrived.
+    """
     try:
-        while True:
-            data = await websocket.receive_text()
+        data_json = json.loads(data)
 
-            try:
-                data_json = json.loads(data)
-
-                # Extract data
-                speaker = data_json.get("speaker", "Unknown")
-                text = data_json.get("text", "")
-                timestamp_str = data_json.get("timestamp")
-
-                # Parse timestamp
-                if timestamp_str:
-                    timestamp = datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
-                else:
-                    timestamp = datetime.utcnow()
-
-                # 1. Run sentiment analysis first
-                sentiment_result = await analyze_sentiment(text)
-                
-                # Print dominant emotion in red
-                if sentiment_result:
-                    dominant_emotion = max(sentiment_result, key=sentiment_result.get)
-                    dominant_score = sentiment_result[dominant_emotion]
-                    # \033[31m is RED, \033[0m is RESET
-                    print(f"\033[31m[Input] {text}\033[0m")
-                    print(f"\033[31m[Emotion] {dominant_emotion} ({dominant_score:.1%})\033[0m")
-
-                # 2. Save transcript AND sentiment to database
+        # Extract data
+        speaker = data_json.get("speaker", "Unknown")
+        text = data_json.get("text", "")
+        timestamp_str = data_json.get("timestamp")
+        block_id = data_json.get("block_id")
+        audio_base64 = data_json.get("audio")
+        audio_format = data_json.get("audio_format")
+
+        # Parse timestamp
+        if timestamp_str:
+            timestamp = datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
+        else:
+            timestamp = datetime.utcnow()
+
+        audio_bytes = base64.b64decode(audio_base64) if audio_base64 else None
+
+        # 1. Run sentiment (lexicon fallback when overloaded) and audio analysis concurrently
+        analysis = await analyze_caption_with_audio(
+            text, speaker, audio_bytes, audio_format, block_id, meeting_id
+        )
+        if analysis is None:
+            # Superseded by a newer update of the same caption block
+            await _wait_for(previous)
+            return
+        sentiment_result, degraded, audio_result = analysis
+
+        # Print dominant emotion in red
+        if sentiment_result:
+            dominant_emotion = max(sentiment_result, key=sentiment_result.get)
+            dominant_score = sentiment_result[dominant_emotion]
+            # \033[31m is RED, \033[0m is RESET
+            print(f"\033[31m[Input] {text}\033[0m")
+            print(f"\033[31m[Emotion] {dominant_emotion} ({dominant_score:.1%})\033[0m")
+
+        # Keep arrival order for everything below
+        await _wait_for(previous)
+
+        # Ids, the history buffer and the broadcast must follow the same order
+        # across the meeting's connections, otherwise a resuming client that
+        # tracks the highest transcript_id it saw could skip a lower one
+        meeting_history = history.get(meeting_id)
+        meeting_history.in_use += 1
+        try:
+            async with meeting_history.lock:
+                # 2. Save transcript, sentiment AND audio features to database
                 async with AsyncSessionLocal() as session:
                     transcript = Transcript(
                         speaker=speaker,
                         text=text,
                         timestamp=timestamp,
-                        sentiment_analysis=sentiment_result
+                        sentiment_analysis=sentiment_result,
+                        audio_analysis=audio_result
                     )
                     session.add(transcript)
                     await session.commit()
@@ -61,33 +98,78 @@ async def websocket_endpoint(websocket: WebSocket):
                     "speaker": speaker,
                     "text": text,
                     "timestamp": timestamp.isoformat(),
-                    "sentiment": sentiment_result
+                    "sentiment": sentiment_result,
+                    "audio": audio_result,
+                    "degraded": degraded
                 }
 
-                # 4. Send results back to frontend
-                await manager.broadcast(json.dumps(response))
-
-                # 5. Optional: Check if coaching is needed
-                # dominant_emotion = max(sentiment_result, key=sentiment_result.get)
-                # if dominant_emotion in ["怒り", "恐れ", "嫌悪"] and sentiment_result[dominant_emotion] > 0.5:
-                #     # Trigger coaching service
-                #     pass
-
-            except json.JSONDecodeError:
-                print(f"Failed to decode JSON: {data}")
-                await manager.broadcast(json.dumps({
-                    "type": "error",
-                    "message": "Invalid JSON format"
-                }))
-
-            except Exception as e:
-                print(f"Error processing data: {e}")
-                import traceback
-                traceback.print_exc()
-                await manager.broadcast(json.dumps({
-                    "type": "error",
-                    "message": str(e)
-                }))
+                # 4. Keep it for late joiners, then send results back to frontend
+                history.record(meeting_id, response)
+                await manager.publish(response, meeting_id)
+        finally:
+            meeting_history.in_use -= 1
+
+        # 5. Optional: Check if coaching is needed
+        # dominant_emotion = max(sentiment_result, key=sentiment_result.get)
+        # if dominant_emotion in ["怒り", "恐れ", "嫌悪"] and sentiment_result[dominant_emotion] > 0.5:
+        #     # Trigger coaching service
+        #     pass
+
+    except json.JSONDecodeError:
+        print(f"Failed to decode JSON: {data}")
+        await _wait_for(previous)
+        await manager.broadcast(json.dumps({
+            "type": "error",
+            "message": "Invalid JSON format"
+        }), meeting_id)
+
+    except Exception as e:
+        print(f"Error processing data: {e}")
+        import traceback
+        traceback.print_exc()
+        await _wait_for(previous)
+        await manager.broadcast(json.dumps({
+            "type": "error",
+            "message": str(e)
+        }), meeting_id)
+
+
+@router.websocket("/ws")
+async def websocket_endpoint(
+    websocket: WebSocket,
+    meeting_id: str = "default",
+    last_transcript_id: Optional[int] = None,
+    delta: bool = False
+):
+    await manager.connect(websocket, meeting_id, delta)
+
+    # Late joiners and reconnecting clients catch up from memory, not the database.
+    # Taken right after registering so no message is missed in between.
+    meeting_history = history.find(meeting_id)
+    snapshot = meeting_history.snapshot()
+    catch_up, snapshot["truncated"] = meeting_history.since(last_transcript_id)
+    try:
+        await websocket.send_text(json.dumps(snapshot))
+        for message in catch_up:
+            await websocket.send_text(json.dumps(message))
+    except WebSocketDisconnect:
+        manager.disconnect(websocket)
+        return
+
+    # Messages are analyzed concurrently so that a newer caption can supersede
+    # an older one still waiting for a model slot (see admission.py); each task
+    # is chained to the previous one so results are saved and sent in order.
+    # At most WS_MAX_OUTSTANDING_MESSAGES are in progress; beyond that reading
+    # pauses until one finishes, so a flooding client is slowed down instead
+    # of piling up tasks (and their audio payloads) in memory.
+    outstanding = asyncio.Semaphore(settings.WS_MAX_OUTSTANDING_MESSAGES)
+    previous: Optional[asyncio.Task] = None
+    try:
+        while True:
+            data = await websocket.receive_text()
+            await outstanding.acquire()
+            previous = asyncio.create_task(handle_message(data, meeting_id, previous))
+            previous.add_done_callback(lambda _: outstanding.release())
 
     except WebSocketDisconnect:
         manager.disconnect(websocket)
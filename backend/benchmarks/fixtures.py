@@ -0,0 +1,109 @@
+# マイクロベンチマーク用のローカルフィクスチャ（小型モデル・合成音声・疑似WebSocket）
+from io import BytesIO
+from typing import Dict, List
+
+import numpy as np
+import soundfile as sf
+import torch
+from transformers import AutoModelForSequenceClassification, DebertaV2Config
+
+from app.services.analysis import sentiment
+from app.services.analysis.sentiment import EMOTION_LABELS
+
+SAMPLE_RATE = 16000
+
+_SAMPLE_TEXT = "今日のプレゼンは大成功でした！みんなに褒められて嬉しいです。"
+
+
+class CharTokenizer:
+    """
+    Character-level stand-in for the DeBERTa tokenizer
+
+    Accepts the same call signature as the HuggingFace tokenizer used in
+    sentiment._run_batch_inference, without downloading a vocabulary.
+    """
+
+    def __init__(self, vocab_size: int):
+        self.vocab_size = vocab_size
+
+    def __call__(self, texts, return_tensors="pt", truncation=True, max_length=512, padding=True):
+        if isinstance(texts, str):
+            texts = [texts]
+        ids = [
+            [1] + [2 + ord(ch) % (self.vocab_size - 2) for ch in text][: max_length - 1]
+            for text in texts
+        ]
+        width = max(len(row) for row in ids)
+        input_ids = torch.zeros((len(ids), width), dtype=torch.long)
+        attention_mask = torch.zeros((len(ids), width), dtype=torch.long)
+        for i, row in enumerate(ids):
+            input_ids[i, :len(row)] = torch.tensor(row)
+            attention_mask[i, :len(row)] = 1
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+
+def install_tiny_model() -> None:
+    """Replace the sentiment model with a small randomly initialized DeBERTa (offline)"""
+    config = DebertaV2Config(
+        vocab_size=512,
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=128,
+        max_position_embeddings=512,
+        num_labels=len(EMOTION_LABELS)
+    )
+    torch.manual_seed(0)
+    model = AutoModelForSequenceClassification.from_config(config)
+    model.eval()
+
+    sentiment._model = model
+    sentiment._tokenizer = CharTokenizer(config.vocab_size)
+
+
+def make_texts(batch_size: int, length: int) -> List[str]:
+    """`batch_size` Japanese texts of `length` characters"""
+    repeated = _SAMPLE_TEXT * (length // len(_SAMPLE_TEXT) + 1)
+    return [repeated[i % len(_SAMPLE_TEXT):][:length] for i in range(batch_size)]
+
+
+def make_speech_like(duration: float, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """Deterministic voiced signal: 180 Hz harmonics with slow amplitude modulation and noise"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(sr * duration)) / sr
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3.0 * t)
+    voiced = sum(np.sin(2 * np.pi * 180.0 * k * t) / k for k in (1, 2, 3))
+    y = 0.3 * envelope * voiced + 0.01 * rng.standard_normal(len(t))
+    return y.astype(np.float32)
+
+
+def make_wav_bytes(duration: float, sr: int = SAMPLE_RATE) -> bytes:
+    buffer = BytesIO()
+    sf.write(buffer, make_speech_like(duration, sr), sr, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def make_analysis_result() -> Dict:
+    """A representative analysis_result payload"""
+    return {
+        "type": "analysis_result",
+        "transcript_id": 1,
+        "speaker": "ベンチマーク",
+        "text": _SAMPLE_TEXT,
+        "timestamp": "2025-12-19T12:00:00+00:00",
+        "sentiment": {label: 1.0 / len(EMOTION_LABELS) for label in EMOTION_LABELS},
+        "degraded": False
+    }
+
+
+class FakeWebSocket:
+    """Minimal WebSocket stand-in that only counts what was sent"""
+
+    def __init__(self):
+        self.sent_bytes = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message: str):
+        self.sent_bytes += len(message)
@@ -0,0 +1,246 @@
+"""
+ホットパスのマイクロベンチマーク
+
+各ステージの処理時間（中央値）を計測し、保存済みのベースラインと比較する。
+しきい値を超えて遅くなったケースがあれば終了コード1で失敗する。
+ベースラインが無い場合も、--allow-missing-baseline を付けない限り失敗する。
+
+    uv run python -m benchmarks.run                    # ベースラインと比較
+    uv run python -m benchmarks.run --update-baseline  # ベースラインを保存
+    uv run python -m benchmarks.run --only broadcast   # 名前で絞り込み
+    uv run python -m benchmarks.run --allow-missing-baseline  # ベースライン無しでも成功
+
+ベースラインはマシンに依存するため、比較は同じホストで行うこと。
+小型のランダム初期化モデルと合成データを使うので、オフラインで実行できる。
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+from unittest import mock
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.session import Base
+from app.models.transcript import Transcript
+from app.services.analysis import audio, sentiment
+from app.websockets.manager import ConnectionManager
+from benchmarks import fixtures
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+BATCH_SIZES = [1, 8, 32]
+TEXT_LENGTHS = [16, 128, 512]
+CLIP_DURATIONS = [1.0, 5.0, 15.0]
+FAN_OUTS = [1, 10, 100]
+
+
+def _time_sync(fn: Callable[[], object], repeat: int, warmup: int = 2) -> float:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+async def _time_async(fn: Callable[[], Awaitable[object]], repeat: int, warmup: int = 2) -> float:
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def bench_inference(results: Dict[str, float], repeat: int) -> None:
+    fixtures.install_tiny_model()
+    for batch_size in BATCH_SIZES:
+        for length in TEXT_LENGTHS:
+            texts = fixtures.make_texts(batch_size, length)
+            results[f"run_inference/batch={batch_size}/chars={length}"] = _time_sync(
+                lambda: sentiment._run_batch_inference(texts), repeat
+            )
+
+
+def bench_audio_features(results: Dict[str, float], repeat: int) -> None:
+    sr = fixtures.SAMPLE_RATE
+    for duration in CLIP_DURATIONS:
+        y = fixtures.make_speech_like(duration)
+        results[f"calculate_volume/{duration:g}s"] = _time_sync(lambda: audio._calculate_volume(y), repeat)
+        results[f"calculate_pitch/{duration:g}s"] = _time_sync(lambda: audio._calculate_pitch(y, sr), repeat)
+
+
+def bench_process_audio(results: Dict[str, float], repeat: int) -> None:
+    for duration in CLIP_DURATIONS:
+        wav_bytes = fixtures.make_wav_bytes(duration)
+        results[f"process_audio/soundfile/{duration:g}s"] = _time_sync(
+            lambda: audio._process_audio(wav_bytes, "wav"), repeat
+        )
+        # Force the pydub fallback branch (pydub reads/writes WAV without FFmpeg)
+        with mock.patch.object(audio.sf, "read", side_effect=RuntimeError("forced fallback")):
+            results[f"process_audio/pydub/{duration:g}s"] = _time_sync(
+                lambda: audio._process_audio(wav_bytes, "wav"), repeat
+            )
+
+
+async def bench_transcript_insert(results: Dict[str, float], repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        message = fixtures.make_analysis_result()
+
+        async def insert():
+            async with session_factory() as session:
+                session.add(Transcript(
+                    speaker=message["speaker"],
+                    text=message["text"],
+                    sentiment_analysis=message["sentiment"]
+                ))
+                await session.commit()
+
+        results["transcript_insert_commit"] = await _time_async(insert, repeat)
+        await engine.dispose()
+
+
+async def bench_broadcast(results: Dict[str, float], repeat: int) -> None:
+    message = json.dumps(fixtures.make_analysis_result())
+    for fan_out in FAN_OUTS:
+        manager = ConnectionManager()
+        for _ in range(fan_out):
+            await manager.connect(fixtures.FakeWebSocket(), "bench")
+        results[f"broadcast/sockets={fan_out}"] = await _time_async(
+            lambda: manager.broadcast(message, "bench"), repeat
+        )
+
+
+async def bench_publish(results: Dict[str, float], repeat: int) -> None:
+    message = fixtures.make_analysis_result()
+    for fan_out in FAN_OUTS:
+        manager = ConnectionManager()
+        for _ in range(fan_out):
+            await manager.connect(fixtures.FakeWebSocket(), "bench", delta=True)
+        results[f"publish_delta/sockets={fan_out}"] = await _time_async(
+            lambda: manager.publish(message, "bench"), repeat
+        )
+
+
+# Case name prefixes produced by each group
+BENCHMARK_GROUPS = [
+    (("run_inference",), bench_inference),
+    (("calculate_volume", "calculate_pitch"), bench_audio_features),
+    (("process_audio",), bench_process_audio),
+    (("transcript_insert_commit",), bench_transcript_insert),
+    (("broadcast",), bench_broadcast),
+    (("publish_delta",), bench_publish),
+]
+
+
+def run_benchmarks(repeat: int, only: Optional[str]) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    for prefixes, bench in BENCHMARK_GROUPS:
+        if only and not any(only in prefix or prefix in only for prefix in prefixes):
+            continue
+        if asyncio.iscoroutinefunction(bench):
+            asyncio.run(bench(results, repeat))
+        else:
+            bench(results, repeat)
+    if only:
+        results = {name: value for name, value in results.items() if only in name}
+    return results
+
+
+def _host_info() -> Dict[str, str]:
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "torch_threads": str(torch.get_num_threads())
+    }
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Print a comparison table and return the names of regressed cases"""
+    regressions = []
+    print(f"{'case':45s} {'median':>10s} {'baseline':>10s} {'change':>8s}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:45s} {value * 1000:8.3f}ms {'-':>10s} {'new':>8s}")
+            continue
+        change = value / base - 1.0
+        mark = ""
+        if change > threshold:
+            regressions.append(name)
+            mark = "  ✗ REGRESSION"
+        print(f"{name:45s} {value * 1000:8.3f}ms {base * 1000:8.3f}ms {change:+7.1%}{mark}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the backend hot paths")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per case")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown vs baseline (0.2 = 20%%)")
+    parser.add_argument("--only", help="run only cases whose name contains this string")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="succeed when there is no baseline to compare against")
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)  # keep inference timings stable between runs
+    results = run_benchmarks(args.repeat, args.only)
+
+    if args.update_baseline:
+        stored = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                stored = json.load(f).get("results", {})
+        stored.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump({"host": _host_info(), "results": stored}, f, indent=2, ensure_ascii=False)
+        compare(results, {}, args.threshold)
+        print(f"\n✓ Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        compare(results, {}, args.threshold)
+        if args.allow_missing_baseline:
+            print(f"\n⚠ No baseline at {args.baseline}. Run with --update-baseline first.")
+            return 0
+        print(f"\n✗ No baseline at {args.baseline}. Run with --update-baseline first.")
+        return 1
+
+    with open(args.baseline) as f:
+        stored = json.load(f)
+    if stored.get("host") != _host_info():
+        print(f"⚠ Baseline was recorded on a different host: {stored.get('host')}\n")
+
+    regressions = compare(results, stored.get("results", {}), args.threshold)
+    if regressions:
+        print(f"\n✗ {len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}")
+        return 1
+    print("\n✓ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+# transcriptsテーブルにaudio_analysisカラムを追加するマイグレーションスクリプト
+import asyncio
+from sqlalchemy import text
+from app.models.session import engine
+
+async def migrate():
+    print("Starting migration: Add audio_analysis column to transcripts table...")
+    async with engine.begin() as conn:
+        try:
+            # Using raw SQL for SQLite migration
+            await conn.execute(text("ALTER TABLE transcripts ADD COLUMN audio_analysis JSON"))
+            print("✓ Successfully added 'audio_analysis' column.")
+        except Exception as e:
+            if "duplicate column" in str(e) or "no such table" in str(e): # Adjust error check as needed for SQLite
+                 print(f"? Migration might have already run or failed: {e}")
+            else:
+                 print(f"✗ Migration failed: {e}")
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
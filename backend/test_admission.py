@@ -0,0 +1,205 @@
+"""
+アドミッション制御（AdmissionController）の動作確認スクリプト
+感情分析モデルの代わりに一定時間待つだけの関数を使い、
+破棄・縮退・Deficit Round-Robin・キャンセル・会議状態の破棄を確認する
+"""
+import asyncio
+import sys
+import os
+
+# Add the app directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.analysis import admission
+from app.services.analysis.admission import AdmissionController
+from app.services.analysis.sentiment import EMOTION_LABELS
+
+INFERENCE_SECONDS = 0.05
+
+# Texts in the order the fake model was called
+model_calls = []
+
+
+async def fake_analyze_sentiment(text):
+    """Stand-in for the model: records the call and sleeps"""
+    model_calls.append(text)
+    await asyncio.sleep(INFERENCE_SECONDS)
+    return {label: 1.0 / len(EMOTION_LABELS) for label in EMOTION_LABELS}
+
+
+failures = []
+
+
+def check(name, condition, detail=""):
+    if condition:
+        print(f"  ✓ {name}")
+    else:
+        print(f"  ✗ {name} {detail}")
+        failures.append(name)
+
+
+def outcome(result):
+    """'model', 'lexicon' or 'dropped'"""
+    if result is None:
+        return "dropped"
+    return "lexicon" if result[1] else "model"
+
+
+def check_idle(name, controller):
+    status = controller.status()
+    check(f"{name}: スロットと待ち行列が空に戻る",
+          status["in_flight"] == 0 and status["pending"] == 0, str(status))
+
+
+async def test_supersede_and_degrade():
+    print("【同じブロックの古い更新は破棄、別ブロックの古い発話は縮退】")
+    controller = AdmissionController(max_in_flight=1, max_pending=8, max_queue_wait=5.0)
+    results = await asyncio.gather(
+        controller.analyze("占有", "X"),
+        controller.analyze("途中", "A", block_id="b1"),
+        controller.analyze("途中の続き", "A", block_id="b1"),
+        controller.analyze("次のブロック", "A", block_id="b2"),
+    )
+    check("実行中の字幕はモデルで処理", outcome(results[0]) == "model")
+    check("同じブロックの古い更新は破棄", outcome(results[1]) == "dropped")
+    check("別ブロックの古い発話は辞書で処理", outcome(results[2]) == "lexicon")
+    check("最新の発話はモデルで処理", outcome(results[3]) == "model")
+    stats = controller.status()["meetings"]["default"]
+    check("件数の集計", (stats["admitted"], stats["degraded"], stats["superseded"]) == (2, 1, 1), str(stats))
+    check_idle("破棄・縮退", controller)
+
+
+async def test_queue_full_and_timeout():
+    print("【待ち行列が満杯・待ち時間超過の場合は縮退】")
+    controller = AdmissionController(max_in_flight=1, max_pending=1, max_queue_wait=5.0)
+    results = await asyncio.gather(
+        controller.analyze("占有", "X"),
+        controller.analyze("待機", "A"),
+        controller.analyze("満杯", "B"),
+    )
+    check("満杯時は辞書で処理", [outcome(r) for r in results] == ["model", "model", "lexicon"],
+          str([outcome(r) for r in results]))
+
+    controller = AdmissionController(max_in_flight=1, max_pending=8, max_queue_wait=INFERENCE_SECONDS / 5)
+    results = await asyncio.gather(controller.analyze("占有", "X"), controller.analyze("待ちすぎ", "A"))
+    check("待ち時間超過は辞書で処理", outcome(results[1]) == "lexicon")
+    check_idle("縮退", controller)
+
+
+async def test_weighted_round_robin():
+    print("【会議ごとの重み付きラウンドロビン】")
+    model_calls.clear()
+    controller = AdmissionController(
+        max_in_flight=1, max_pending=20, max_queue_wait=5.0,
+        quotas={"big": {"weight": 2.0}}
+    )
+    tasks = [controller.analyze("占有", "X", meeting_id="other")]
+    tasks += [controller.analyze(f"big{i}", f"s{i}", meeting_id="big") for i in range(8)]
+    tasks += [controller.analyze(f"small{i}", f"t{i}", meeting_id="small") for i in range(4)]
+    await asyncio.gather(*tasks)
+
+    served = [call for call in model_calls if call != "占有"][:9]
+    big_count = sum(call.startswith("big") for call in served)
+    small_count = sum(call.startswith("small") for call in served)
+    check("重み2:1で配分される", (big_count, small_count) == (6, 3), str(served))
+    check("小さい会議も大きい会議の待ち行列を待たずに処理される", "small0" in served[:3], str(served))
+    check_idle("DRR", controller)
+
+
+async def test_meeting_quota():
+    print("【会議ごとの同時推論数の上限】")
+    controller = AdmissionController(
+        max_in_flight=2, max_pending=8, max_queue_wait=5.0,
+        quotas={"capped": {"max_in_flight": 1}}
+    )
+    tasks = [asyncio.create_task(controller.analyze(f"c{i}", f"s{i}", meeting_id="capped")) for i in range(3)]
+    await asyncio.sleep(0)
+    capped = controller.status()["meetings"]["capped"]
+    check("上限を超えた分は待機", (capped["in_flight"], capped["pending"]) == (1, 2), str(capped))
+    other = await controller.analyze("o", "u", meeting_id="other")
+    check("空きスロットは他の会議がすぐ使える", outcome(other) == "model")
+    await asyncio.gather(*tasks)
+    check_idle("上限", controller)
+
+
+async def test_cancellation():
+    print("【待機中・割り当て直後のキャンセル】")
+    controller = AdmissionController(max_in_flight=1, max_pending=8, max_queue_wait=5.0)
+    running = asyncio.create_task(controller.analyze("占有", "X"))
+    waiting = asyncio.create_task(controller.analyze("待機", "A"))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    await asyncio.gather(running, waiting, return_exceptions=True)
+    check_idle("待機中のキャンセル", controller)
+
+    running = asyncio.create_task(controller.analyze("占有", "X"))
+    admitted = asyncio.create_task(controller.analyze("割り当て直後", "A"))
+    # Cancel right after the slot is handed over, before the waiter resumes
+    running.add_done_callback(lambda _: admitted.cancel())
+    results = await asyncio.gather(running, admitted, return_exceptions=True)
+    check("割り当て後にキャンセルされた", isinstance(results[1], asyncio.CancelledError), str(results[1]))
+    check_idle("割り当て直後のキャンセル", controller)
+
+
+async def test_set_capacity():
+    print("【スロット数の変更】")
+    controller = AdmissionController(max_in_flight=1, max_pending=8, max_queue_wait=5.0)
+    tasks = [asyncio.create_task(controller.analyze(str(i), f"s{i}")) for i in range(4)]
+    await asyncio.sleep(0)
+    controller.set_capacity(3)
+    check("増やしたスロットは待機中の字幕にすぐ割り当て", controller.status()["in_flight"] == 3)
+    controller.set_capacity(1)
+    await asyncio.gather(*tasks)
+    check_idle("スロット数の変更", controller)
+
+
+async def test_meeting_eviction():
+    print("【使われていない会議の状態の破棄】")
+    controller = AdmissionController(
+        max_in_flight=1, max_pending=8, max_queue_wait=5.0,
+        quotas={"configured": {"weight": 2.0}}, max_meetings=3
+    )
+    await controller.analyze("q", "A", meeting_id="configured")
+    for i in range(10):
+        await controller.analyze(str(i), "A", meeting_id=f"m{i}")
+    meetings = list(controller.status()["meetings"])
+    check("会議数は上限以内", len(meetings) <= 3, str(meetings))
+    check("クォータ設定のある会議は残る", "configured" in meetings, str(meetings))
+    check("最近の会議は残る", "m9" in meetings, str(meetings))
+
+    controller.idle_timeout = 0.0
+    check("タイムアウトで破棄", list(controller.status()["meetings"]) == ["configured"],
+          str(list(controller.status()["meetings"])))
+
+
+async def test_wait_percentile():
+    print("【待ち時間のp95】")
+    controller = AdmissionController(max_in_flight=1, max_pending=8, max_queue_wait=5.0)
+    meeting = controller._meeting("default")
+    meeting.record_wait(0.1)
+    meeting.record_wait(0.9)
+    check("サンプル2件のp95は大きい方", meeting.status()["wait_p95"] == 0.9, str(meeting.status()))
+
+
+async def main():
+    admission.analyze_sentiment = fake_analyze_sentiment
+
+    await test_supersede_and_degrade()
+    await test_queue_full_and_timeout()
+    await test_weighted_round_robin()
+    await test_meeting_quota()
+    await test_cancellation()
+    await test_set_capacity()
+    await test_meeting_eviction()
+    await test_wait_percentile()
+
+    print()
+    if failures:
+        print(f"✗ {len(failures)} 件失敗: {failures}")
+        return 1
+    print("✓ すべて成功")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
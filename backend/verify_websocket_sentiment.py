@@ -15,6 +15,11 @@ async def verify_sentiment_storage():
     try:
         async with websockets.connect(uri) as websocket:
             print("Connected!")
+
+            # The server first sends a snapshot, then replays buffered results
+            snapshot = json.loads(await websocket.recv())
+            last_seen_id = snapshot.get("last_transcript_id") or 0
+            print(f"Received snapshot: last_transcript_id={snapshot.get('last_transcript_id')}")
             
             # Send test data
             test_text = "この機能が実装されて本当に嬉しいです！素晴らしい進捗だと思います。"
@@ -27,11 +32,17 @@ async def verify_sentiment_storage():
             print(f"Sending data: {json.dumps(data, ensure_ascii=False)}")
             await websocket.send(json.dumps(data))
             
-            # Receive response
-            response = await websocket.recv()
+            # Receive response (skip the catch-up replay of earlier results)
+            while True:
+                response = await websocket.recv()
+                response_data = json.loads(response)
+                if response_data.get("type") == "error":
+                    break
+                if (response_data.get("type") == "analysis_result"
+                        and response_data.get("transcript_id", 0) > last_seen_id):
+                    break
             print(f"Received response: {response}")
-            
-            response_data = json.loads(response)
+
             if response_data.get("type") == "analysis_result":
                 print("✓ Received analysis result")
                 print(f"  Sentiment: {response_data.get('sentiment')}")
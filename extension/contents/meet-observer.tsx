@@ -9,8 +9,11 @@ export const config: PlasmoCSConfig = {
     matches: ["https://meet.google.com/*"]
 }
 
+// Meeting code from the URL (e.g. "abc-defg-hij"), used by the backend to schedule inference fairly per meeting
+const meetingId = encodeURIComponent(window.location.pathname.replace(/^\//, "") || "default")
+
 const MeetObserver = () => {
-    const { ws, status, setStatus } = useWebSocket("ws://localhost:8000/ws")
+    const { ws, status, setStatus } = useWebSocket(`ws://localhost:8000/ws?meeting_id=${meetingId}`)
 
     useTranscriptObserver(ws, status, setStatus)
 
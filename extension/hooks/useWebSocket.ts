@@ -1,32 +1,68 @@
-// WebSocket接続の管理とステータス状態を提供するカスタムフック
-import { useEffect, useState } from "react"
+// WebSocket接続の管理とステータス状態を提供するカスタムフック（切断時は自動再接続）
+import { useEffect, useRef, useState } from "react"
+
+const INITIAL_RETRY_DELAY_MS = 1000
+const MAX_RETRY_DELAY_MS = 30000
 
 export const useWebSocket = (url: string) => {
     const [ws, setWs] = useState<WebSocket | null>(null)
     const [status, setStatus] = useState("Disconnected")
+    // Last analysis_result seen, so a reconnect only receives what was missed
+    const lastTranscriptId = useRef<number | null>(null)
 
     useEffect(() => {
-        const socket = new WebSocket(url)
+        let socket: WebSocket | null = null
+        let retryTimer: ReturnType<typeof setTimeout> | null = null
+        let retryDelay = INITIAL_RETRY_DELAY_MS
+        let closedByCleanup = false
 
-        socket.onopen = () => {
-            console.log("Connected to WebSocket")
-            setStatus("Connected")
-        }
+        const connect = () => {
+            const resumeUrl = lastTranscriptId.current === null
+                ? url
+                : `${url}${url.includes("?") ? "&" : "?"}last_transcript_id=${lastTranscriptId.current}`
+            socket = new WebSocket(resumeUrl)
 
-        socket.onclose = () => {
-            console.log("Disconnected from WebSocket")
-            setStatus("Disconnected")
-        }
+            socket.onopen = () => {
+                console.log("Connected to WebSocket")
+                setStatus("Connected")
+                retryDelay = INITIAL_RETRY_DELAY_MS
+            }
+
+            socket.onmessage = (event) => {
+                try {
+                    const data = JSON.parse(event.data)
+                    if (data.type === "analysis_result" && typeof data.transcript_id === "number") {
+                        lastTranscriptId.current = Math.max(lastTranscriptId.current ?? 0, data.transcript_id)
+                    }
+                } catch {
+                    // Ignore non-JSON messages
+                }
+            }
+
+            socket.onclose = () => {
+                console.log("Disconnected from WebSocket")
+                setStatus("Disconnected")
+                if (!closedByCleanup) {
+                    console.log(`Reconnecting in ${retryDelay}ms...`)
+                    retryTimer = setTimeout(connect, retryDelay)
+                    retryDelay = Math.min(retryDelay * 2, MAX_RETRY_DELAY_MS)
+                }
+            }
+
+            socket.onerror = (error) => {
+                console.error("WebSocket error:", error)
+                setStatus("Error")
+            }
 
-        socket.onerror = (error) => {
-            console.error("WebSocket error:", error)
-            setStatus("Error")
+            setWs(socket)
         }
 
-        setWs(socket)
+        connect()
 
         return () => {
-            socket.close()
+            closedByCleanup = true
+            if (retryTimer) clearTimeout(retryTimer)
+            socket?.close()
         }
     }, [url])
 